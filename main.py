@@ -1,4 +1,5 @@
 import os, sys, argparse
+from functools import lru_cache
 from pathlib import Path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
 
@@ -8,11 +9,15 @@ from src.extractors.pdf_reader import PDFTableExtractor
 from src.extractors.docx_reader import WordTableExtractor
 from src.transformers.table_normalizer import TableNormalizer
 from src.writers.excel_writer import ExcelWriter
+from src.batch.scheduler import BatchScheduler
+from src.batch.pipeline import StagedPipeline
 
-def build_converter():
+@lru_cache(maxsize=None)
+def build_converter(**pdf_opts):
+    # Un contexto por proceso y ajustes: reutiliza el caché de planes del normalizador
     log = get_logger(__name__)
     return {
-        ".pdf": PDFTableExtractor(),
+        ".pdf": PDFTableExtractor(**pdf_opts),
         ".docx": WordTableExtractor(),
         ".doc": WordTableExtractor(),
         "normalizer": TableNormalizer(),
@@ -20,16 +25,19 @@ def build_converter():
         "log": log
     }
 
-def convert_one(file_path, out_path=None):
-    ctx = build_converter()
+def extract_stage(file_path, on_progress=None, **pdf_opts):
+    ctx = build_converter(**pdf_opts)
     ext = Path(file_path).suffix.lower()
     if ext not in ctx:
         raise ValueError("Extensión no soportada")
 
-    tables = ctx[ext].extract_tables(file_path)
+    tables = ctx[ext].extract_tables(file_path, on_progress=on_progress)
     if not tables:
         tables = [[["No se encontraron tablas"]]]
+    return tables
 
+def normalize_stage(tables):
+    ctx = build_converter()
     # Detectar ficha de costo por encabezado
     first_row = tables[0][0] if tables and tables[0] else []
     is_ficha = any("ficha" in str(cell).lower() for cell in first_row)
@@ -38,7 +46,14 @@ def convert_one(file_path, out_path=None):
         ctx["normalizer"].normalize_table(tbl, name="ficha_costo" if is_ficha else "tabla")
         for tbl in tables
     ]
+    return dfs, is_ficha
+
+def normalize_stats():
+    # Contadores del caché de planes de este proceso
+    return {f"planes_{k}": v for k, v in build_converter()["normalizer"].plan_stats.items()}
 
+def write_stage(dfs, is_ficha, file_path, out_path=None):
+    ctx = build_converter()
     if is_ficha and len(dfs) == 1:
         tpl = config._config["excel"]["templates"]["ficha_costo"]
         return ctx["writer"].write_using_template(dfs[0], tpl, out_path or f"{Path(file_path).stem}_ficha.xlsx")
@@ -48,23 +63,37 @@ def convert_one(file_path, out_path=None):
         multi = {f"tabla_{i+1}": df for i, df in enumerate(dfs)}
         return ctx["writer"].write_multiple_dataframes(multi, out_path or f"{Path(file_path).stem}_out.xlsx")
 
+def convert_one(file_path, out_path=None, on_progress=None, **pdf_opts):
+    tables = extract_stage(file_path, on_progress=on_progress, **pdf_opts)
+    dfs, is_ficha = normalize_stage(tables)
+    return write_stage(dfs, is_ficha, file_path, out_path)
+
 def cli():
     parser = argparse.ArgumentParser("pdf_word_to_excel")
     parser.add_argument("input", help="Archivo o carpeta")
     parser.add_argument("-o","--output", help="Salida")
     parser.add_argument("-b","--batch", action="store_true", help="Procesar carpeta")
+    parser.add_argument("--no-pipeline", action="store_true",
+                        help="Lote secuencial: cada archivo completo en un solo proceso vigilado")
     args = parser.parse_args()
 
     if args.batch:
         in_dir = Path(args.input)
-        out_dir = Path(args.output or config.paths.output_dir)
+        out_dir = Path(args.output or config.paths.output_dir).resolve()
         out_dir.mkdir(exist_ok=True)
-        for f in in_dir.iterdir():
-            if f.suffix.lower() in (".pdf", ".docx", ".doc"):
-                try:
-                    convert_one(str(f), str(out_dir/f"{f.stem}.xlsx"))
-                except Exception as e:
-                    print(f"Error {f.name}: {e}")
+        files = [f for f in in_dir.iterdir() if f.suffix.lower() in (".pdf", ".docx", ".doc")]
+        if args.no_pipeline:
+            jobs, stats = BatchScheduler(convert_one).run(files, out_dir), None
+        else:
+            pipeline = StagedPipeline(extract_stage, normalize_stage, write_stage,
+                                      normalize_stats_fn=normalize_stats)
+            jobs, stats = pipeline.run(files, out_dir)
+        for job in jobs:
+            if job.error:
+                print(f"Error {job.path.name}: {job.error}")
+        print(BatchScheduler.report(jobs))
+        if stats:
+            print(stats.report())
         print("Batch completado")
     else:
         out = convert_one(args.input, args.output)
@@ -0,0 +1,18 @@
+"""
+Paquete de procesamiento por lotes.
+"""
+from .scheduler import BatchScheduler, CostEstimator, JobEstimate
+from .watchdog import JobTimeout, run_with_watchdog
+from .pipeline import StagedPipeline, PipelineBroken, PipelineStats, StageStats
+
+__all__ = [
+    "BatchScheduler",
+    "CostEstimator",
+    "JobEstimate",
+    "JobTimeout",
+    "run_with_watchdog",
+    "StagedPipeline",
+    "PipelineBroken",
+    "PipelineStats",
+    "StageStats",
+]
@@ -0,0 +1,322 @@
+"""
+Pipeline por etapas para lotes: extracción → normalización → escritura.
+Cada etapa corre en sus propios procesos y se comunica por colas acotadas,
+de modo que el archivo N+1 se extrae mientras el N se normaliza o guarda.
+Las tablas viajan por pickle: para tablas de texto y DataFrames de este
+tamaño resultó igual o más barato que Arrow IPC.
+"""
+
+import queue
+import signal
+import threading
+import time
+import multiprocessing as mp
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..core.logger import get_logger
+from ..core.config import config
+from .scheduler import BatchScheduler
+from .watchdog import JobTimeout
+
+EXTRACT = "extracción"
+NORMALIZE = "normalización"
+WRITE = "escritura"
+
+
+class PipelineBroken(RuntimeError):
+    """Un proceso de etapa terminó sin completar su trabajo."""
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int = 1
+    items: int = 0
+    errors: int = 0
+    busy_s: float = 0.0
+    max_depth: int = 0
+    mean_depth: float = 0.0
+    # Contadores propios de la etapa (p. ej. aciertos del caché de planes)
+    extra: Dict[str, int] = field(default_factory=dict)
+
+    def merge(self, other: "StageStats") -> None:
+        items = self.items + other.items
+        if items:
+            self.mean_depth = (self.mean_depth * self.items + other.mean_depth * other.items) / items
+        self.items = items
+        self.errors += other.errors
+        self.busy_s += other.busy_s
+        self.max_depth = max(self.max_depth, other.max_depth)
+        for key, value in other.extra.items():
+            self.extra[key] = self.extra.get(key, 0) + value
+
+
+@dataclass
+class PipelineStats:
+    wall_s: float = 0.0
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+
+    def report(self) -> str:
+        done = self.stages[WRITE].items if WRITE in self.stages else 0
+        rate = done / self.wall_s if self.wall_s else 0.0
+        lines = [f"Pipeline: {done} archivos en {self.wall_s:.2f}s ({rate:.2f} archivos/s)"]
+        for s in self.stages.values():
+            busy = s.busy_s / (self.wall_s * s.workers) if self.wall_s and s.workers else 0.0
+            lines.append(
+                f"  {s.name:<14} x{s.workers:<2} {s.items:>4} ok {s.errors:>3} err  ocupada {busy:6.1%}"
+                f"  cola salida máx {s.max_depth} media {s.mean_depth:.1f}"
+            )
+            if s.extra:
+                lines.append("    " + ", ".join(f"{k} {v}" for k, v in s.extra.items()))
+        return "\n".join(lines)
+
+
+def _depth(q) -> Optional[int]:
+    try:
+        return q.qsize()
+    except NotImplementedError:  # macOS
+        return None
+
+
+def _depth_stats(stats: StageStats, depths: List[int]) -> None:
+    if depths:
+        stats.max_depth = max(depths)
+        stats.mean_depth = sum(depths) / len(depths)
+
+
+def _extract_only(extract_fn, src, dst, on_progress=None, **pdf_opts):
+    return extract_fn(src, on_progress=on_progress, **pdf_opts)
+
+
+def _normalize_only(normalize_fn, src, dst, tables):
+    dfs, is_ficha = normalize_fn(tables)
+    return is_ficha, dfs
+
+
+def _write_only(write_fn, src, dst, payload):
+    is_ficha, dfs = payload
+    try:
+        return write_fn(dfs, is_ficha, src, dst)
+    except JobTimeout:
+        # No dejar un .xlsx a medio escribir que parezca válido
+        Path(dst).unlink(missing_ok=True)
+        raise
+
+
+def _stage_loop(name, fn, inbox, outbox, results, budget, stats_fn=None):
+    stats, depths = StageStats(name), []
+    # Un único presupuesto por archivo (`budget`) repartido entre etapas: cada
+    # elemento trae lo que le queda y SIGALRM lo interrumpe sin matar el proceso
+    # (sólo POSIX; en otros sistemas no se limita). La espera en colas no cuenta.
+    timed = bool(budget) and hasattr(signal, "setitimer")
+    if timed:
+        def on_alarm(signum, frame):
+            raise JobTimeout("archivo", budget)
+        signal.signal(signal.SIGALRM, on_alarm)
+
+    while True:
+        item = inbox.get()
+        if item is None:
+            break
+        idx, src, dst, payload, remaining = item
+        t0 = time.monotonic()
+        try:
+            if timed:
+                if remaining <= 0:
+                    raise JobTimeout("archivo", budget)
+                signal.setitimer(signal.ITIMER_REAL, remaining)
+            out = fn(src, dst, payload)
+        except JobTimeout as e:
+            stats.errors += 1
+            results.put(("timeout", idx, f"{name}: {e}"))
+            continue
+        except Exception as e:
+            stats.errors += 1
+            results.put(("error", idx, f"{name}: {type(e).__name__}: {e}"))
+            continue
+        finally:
+            if timed:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            stats.busy_s += time.monotonic() - t0
+        stats.items += 1
+        if outbox is None:
+            results.put(("ok", idx, out))
+        else:
+            outbox.put((idx, src, dst, out, remaining - (time.monotonic() - t0)))
+            depth = _depth(outbox)
+            if depth is not None:
+                depths.append(depth)
+    _depth_stats(stats, depths)
+    if stats_fn:
+        stats.extra.update(stats_fn())
+    results.put(("stats", name, stats))
+
+
+class StagedPipeline:
+    """
+    `extract_fn(ruta, on_progress=..., **ajustes)` → tablas crudas; corre en los
+    carriles vigilados de BatchScheduler (orden LPT, timeouts, cuarentena).
+    `normalize_fn(tablas)` → (dfs, es_ficha) y `write_fn(dfs, es_ficha, ruta, salida)`
+    corren en procesos de larga vida (`normalize_workers` / `write_workers`), así
+    el caché de planes se reutiliza. `file_timeout_s` es un único plazo por archivo
+    para el tiempo de proceso de las tres etapas juntas (sin contar colas).
+    `normalize_stats_fn()`, si se da, corre al final de cada worker de normalización
+    y sus contadores se suman en el informe de esa etapa.
+    """
+
+    def __init__(
+        self,
+        extract_fn: Callable,
+        normalize_fn: Callable,
+        write_fn: Callable,
+        queue_size: Optional[int] = None,
+        normalize_stats_fn: Optional[Callable[[], Dict[str, int]]] = None,
+    ):
+        self.log = get_logger(__name__)
+        self.cfg = config.batch
+        self.extract_fn = extract_fn
+        self.normalize_fn = normalize_fn
+        self.write_fn = write_fn
+        self.queue_size = queue_size or self.cfg.queue_size
+        self.normalize_stats_fn = normalize_stats_fn
+
+    def run(self, paths, out_dir):
+        # Ruta absoluta: ExcelWriter antepone output_dir a las relativas y
+        # el escritor debe poder borrar exactamente lo que escribió
+        out_dir = Path(out_dir).resolve()
+        ctx = mp.get_context()
+        to_normalize = ctx.Queue(maxsize=self.queue_size)
+        to_write = ctx.Queue(maxsize=self.queue_size)
+        results = ctx.Queue()
+        budget = self.cfg.file_timeout_s
+        normalizers = [
+            ctx.Process(
+                target=_stage_loop,
+                args=(NORMALIZE, partial(_normalize_only, self.normalize_fn),
+                      to_normalize, to_write, results, budget, self.normalize_stats_fn),
+                daemon=True,
+            )
+            for _ in range(self.cfg.normalize_workers)
+        ]
+        writers = [
+            ctx.Process(
+                target=_stage_loop,
+                args=(WRITE, partial(_write_only, self.write_fn), to_write, None, results, budget),
+                daemon=True,
+            )
+            for _ in range(self.cfg.write_workers)
+        ]
+        stages = normalizers + writers
+
+        def broken() -> bool:
+            # Un worker sólo sale con código 0 tras recibir el centinela
+            return any(proc.exitcode not in (None, 0) for proc in stages)
+
+        def put(q, item):
+            while True:
+                if broken():
+                    raise PipelineBroken("Una etapa del pipeline terminó inesperadamente")
+                try:
+                    q.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+        def wait_for(procs):
+            while any(proc.exitcode is None for proc in procs):
+                if broken():
+                    raise PipelineBroken("Una etapa del pipeline terminó inesperadamente")
+                procs[0].join(0.2)
+
+        positions: Dict[int, int] = {}
+        depths: List[int] = []
+
+        def enqueue(job, payload):
+            # Bloquea el carril si la normalización va por detrás (contrapresión)
+            dst = str(out_dir / f"{job.path.stem}.xlsx")
+            remaining = budget - job.run_s if budget else None
+            put(to_normalize, (positions[id(job)], str(job.path), dst, payload, remaining))
+            depth = _depth(to_normalize)
+            if depth is not None:
+                depths.append(depth)
+
+        # Con una etapa caída no tiene sentido seguir extrayendo
+        scheduler = BatchScheduler(
+            partial(_extract_only, self.extract_fn), on_result=enqueue, cancel=broken
+        )
+        jobs = scheduler.plan(paths)
+        positions.update((id(job), i) for i, job in enumerate(jobs))
+
+        stats = PipelineStats()
+        stats.stages[EXTRACT] = StageStats(EXTRACT, workers=self.cfg.workers + self.cfg.ocr_workers)
+        stats.stages[NORMALIZE] = StageStats(NORMALIZE, workers=len(normalizers))
+        stats.stages[WRITE] = StageStats(WRITE, workers=len(writers))
+        finished = threading.Event()
+
+        def collect():
+            while True:
+                try:
+                    kind, key, value = results.get(timeout=0.2)
+                except queue.Empty:
+                    if finished.is_set():
+                        return
+                    continue
+                if kind == "stats":
+                    stats.stages[key].merge(value)
+                    continue
+                job = jobs[key]
+                if kind == "ok":
+                    job.output = value
+                    job.actual_s = time.monotonic() - job.started_at
+                    continue
+                job.error = value
+                self.log.error(f"Error {job.path.name}: {value}")
+                if kind == "timeout":
+                    try:
+                        scheduler._quarantine(job)
+                    except Exception as e:
+                        self.log.error(f"No se pudo poner en cuarentena {job.path.name}: {e}")
+
+        collector = threading.Thread(target=collect, daemon=True)
+        t0 = time.monotonic()
+        for proc in stages:
+            proc.start()
+        collector.start()
+        try:
+            scheduler.run_jobs(jobs, out_dir)
+            for _ in normalizers:
+                put(to_normalize, None)
+            wait_for(normalizers)
+            for _ in writers:
+                put(to_write, None)
+            wait_for(writers)
+        except PipelineBroken as e:
+            self.log.error(str(e))
+        finally:
+            for proc in stages:
+                if proc.is_alive():
+                    proc.terminate()
+                proc.join()
+            # Lo que quede en las colas ya no tiene consumidor
+            to_normalize.cancel_join_thread()
+            to_write.cancel_join_thread()
+            finished.set()
+            collector.join()
+
+        extract = stats.stages[EXTRACT]
+        for job in jobs:
+            if job.run_s is None:
+                extract.errors += 1
+                continue
+            extract.items += 1
+            extract.busy_s += job.run_s
+            if job.output is None and job.error is None:
+                job.error = "Pipeline interrumpido antes de escribir el archivo"
+        _depth_stats(extract, depths)
+
+        stats.wall_s = time.monotonic() - t0
+        self.log.info(stats.report())
+        return jobs, stats
@@ -0,0 +1,207 @@
+"""
+Planificador de lotes: estima el coste de cada archivo y lo ordena
+de mayor a menor (LPT), separando los trabajos con OCR en su propio carril.
+"""
+
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from PyPDF2 import PdfReader
+
+from ..core.logger import get_logger
+from ..core.config import config
+from ..extractors.pdf_reader import tesseract_available
+from .watchdog import JobTimeout, run_with_watchdog
+
+LANE_TEXT = "texto"
+LANE_OCR = "ocr"
+
+
+@dataclass
+class JobEstimate:
+    path: Path
+    size_mb: float
+    pages: int
+    has_text_layer: bool
+    needs_ocr: bool
+    predicted_s: float
+    lane: str
+    # actual_s: de principio a fin (comparable con predicted_s);
+    # run_s: tiempo del último intento dentro del proceso vigilado
+    actual_s: Optional[float] = None
+    run_s: Optional[float] = None
+    started_at: Optional[float] = None
+    output: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    settings: dict = field(default_factory=dict)
+    quarantined: bool = False
+
+
+class CostEstimator:
+    """Predice el tiempo de conversión a partir de tamaño, páginas y capa de texto."""
+
+    def __init__(self):
+        self.log = get_logger(__name__)
+        self.cfg = config.batch
+        # Misma condición que PDFTableExtractor: sin tesseract no hay OCR
+        self.ocr_enabled = config.processing.ocr_enabled and tesseract_available()
+
+    def estimate(self, path) -> JobEstimate:
+        path = Path(path)
+        size_mb = os.path.getsize(path) / 1_048_576
+        pages, has_text = 0, True
+        if path.suffix.lower() == ".pdf":
+            pages, has_text = self._inspect_pdf(path)
+
+        needs_ocr = self.ocr_enabled and not has_text
+        per_page = self.cfg.cost_per_ocr_page_s if needs_ocr else self.cfg.cost_per_page_s
+        predicted = (
+            self.cfg.cost_base_s
+            + size_mb * self.cfg.cost_per_mb_s
+            + max(pages, 1) * per_page
+        )
+        return JobEstimate(
+            path=path,
+            size_mb=size_mb,
+            pages=pages,
+            has_text_layer=has_text,
+            needs_ocr=needs_ocr,
+            predicted_s=predicted,
+            lane=LANE_OCR if needs_ocr else LANE_TEXT,
+        )
+
+    def _inspect_pdf(self, path: Path):
+        """Cuenta páginas y busca texto en las primeras; ante error asume capa de texto."""
+        try:
+            reader = PdfReader(str(path))
+            pages = len(reader.pages)
+            for page in reader.pages[: self.cfg.text_sample_pages]:
+                if (page.extract_text() or "").strip():
+                    return pages, True
+            return pages, False
+        except Exception as e:
+            self.log.debug(f"No se pudo inspeccionar {path.name}: {e}")
+            return 0, True
+
+
+class BatchScheduler:
+    """
+    Ejecuta `fn(entrada, salida, on_progress=..., **ajustes)` sobre un lote en
+    orden de coste descendente. Los archivos sin capa de texto van al carril OCR,
+    con sus propios workers. Cada archivo corre en un proceso vigilado; si agota
+    su presupuesto y necesita OCR se reintenta con los ajustes de `retry_ladder`;
+    si aun así no termina, se copia a cuarentena. Si se da `on_result(job, resultado)`, se
+    llama desde el hilo del carril y quien recibe el resultado es responsable de fijar
+    `job.output` y `job.actual_s` (el planificador no los toca, para no pisarlos).
+    Si `cancel()` devuelve True, los trabajos que aún no empezaron (o sus reintentos)
+    se descartan con error en lugar de ejecutarse.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[..., str],
+        estimator: Optional[CostEstimator] = None,
+        on_result: Optional[Callable[[JobEstimate, object], object]] = None,
+        cancel: Optional[Callable[[], bool]] = None,
+    ):
+        self.log = get_logger(__name__)
+        self.cfg = config.batch
+        self.quarantine_dir = Path(config.paths.quarantine_dir)
+        self.fn = fn
+        self.estimator = estimator or CostEstimator()
+        self.on_result = on_result
+        self.cancel = cancel
+
+    def plan(self, paths) -> List[JobEstimate]:
+        jobs = [self.estimator.estimate(p) for p in paths]
+        return sorted(jobs, key=lambda j: j.predicted_s, reverse=True)
+
+    def run(self, paths, out_dir) -> List[JobEstimate]:
+        return self.run_jobs(self.plan(paths), out_dir)
+
+    def run_jobs(self, jobs: List[JobEstimate], out_dir) -> List[JobEstimate]:
+        out_dir = Path(out_dir)
+        # Los hilos sólo vigilan; el trabajo real ocurre en procesos hijos
+        lanes = {
+            LANE_TEXT: ThreadPoolExecutor(max_workers=self.cfg.workers),
+            LANE_OCR: ThreadPoolExecutor(max_workers=self.cfg.ocr_workers),
+        }
+        try:
+            # El orden de envío fija el orden de arranque dentro de cada carril
+            futures = {
+                lanes[job.lane].submit(self._run_job, job, str(out_dir / f"{job.path.stem}.xlsx")): job
+                for job in jobs
+            }
+            wait(futures)
+            for fut, job in futures.items():
+                exc = fut.exception()
+                if exc is not None:
+                    job.error = f"{type(exc).__name__}: {exc}"
+                    self.log.error(f"Error {job.path.name}: {job.error}")
+        finally:
+            for pool in lanes.values():
+                pool.shutdown()
+        return jobs
+
+    def _run_job(self, job: JobEstimate, dst: str) -> None:
+        # Los ajustes de la escalera sólo abaratan el OCR; sin OCR no hay reintento
+        ladder = [{}, *self.cfg.retry_ladder] if job.needs_ocr else [{}]
+        job.started_at = time.monotonic()
+        for settings in ladder:
+            if self.cancel and self.cancel():
+                job.error = "Lote cancelado antes de procesar el archivo"
+                return
+            job.attempts += 1
+            job.settings = settings
+            try:
+                result, job.run_s = run_with_watchdog(
+                    self.fn,
+                    (str(job.path), dst),
+                    settings,
+                    file_timeout=self.cfg.file_timeout_s,
+                    page_timeout=self.cfg.page_timeout_s,
+                )
+                job.error = None
+                if self.on_result:
+                    self.on_result(job, result)
+                else:
+                    job.output, job.actual_s = result, time.monotonic() - job.started_at
+                return
+            except JobTimeout as e:
+                job.error = str(e)
+                self.log.warning(f"{job.path.name}: {e} (intento {job.attempts}, ajustes {settings})")
+            except Exception as e:
+                job.error = str(e)
+                self.log.error(f"Error {job.path.name}: {e}")
+                return
+        self._quarantine(job)
+
+    def _quarantine(self, job: JobEstimate) -> None:
+        job.quarantined = True
+        self.quarantine_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(job.path, self.quarantine_dir / job.path.name)
+        self.log.error(f"{job.path.name} en cuarentena tras {job.attempts} intentos")
+
+    @staticmethod
+    def report(jobs: List[JobEstimate]) -> str:
+        lines = [f"{'archivo':<40} {'carril':<6} {'pág':>5} {'prev(s)':>9} {'real(s)':>9}"]
+        for j in jobs:
+            real = f"{j.actual_s:9.2f}" if j.actual_s is not None else f"{'error':>9}"
+            lines.append(f"{j.path.name[:40]:<40} {j.lane:<6} {j.pages:>5} {j.predicted_s:9.2f} {real}")
+        done = [j for j in jobs if j.actual_s is not None]
+        predicted = sum(j.predicted_s for j in done)
+        actual = sum(j.actual_s for j in done)
+        ratio = actual / predicted if predicted else 0.0
+        lines.append(f"Total previsto {predicted:.2f}s, real {actual:.2f}s (real/previsto {ratio:.2f})")
+        for j in jobs:
+            if j.quarantined:
+                lines.append(f"Cuarentena: {j.path.name} ({j.error})")
+            elif j.actual_s is not None and j.settings:
+                lines.append(f"Completado con ajustes reducidos {j.settings}: {j.path.name}")
+        return "\n".join(lines)
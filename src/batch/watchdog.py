@@ -0,0 +1,92 @@
+"""
+Ejecución de un trabajo en un proceso aparte que se puede matar si excede
+su presupuesto de tiempo por archivo o por página.
+"""
+
+import os
+import signal
+import time
+import multiprocessing as mp
+from typing import Callable, Optional
+
+
+class JobTimeout(Exception):
+    """El trabajo superó el presupuesto de tiempo y su proceso fue terminado."""
+
+    def __init__(self, kind: str, elapsed: float):
+        self.kind = kind
+        self.elapsed = elapsed
+        super().__init__(f"timeout de {kind} tras {elapsed:.1f}s")
+
+
+def _child(conn, beat, fn, args, kwargs):
+    # Grupo de procesos propio para poder matar también a tesseract
+    if hasattr(os, "setsid"):
+        os.setsid()
+
+    def on_progress():
+        beat.value = time.monotonic()
+
+    try:
+        conn.send(("ok", fn(*args, on_progress=on_progress, **kwargs)))
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _kill(proc) -> None:
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+            return
+        except (ProcessLookupError, PermissionError):
+            pass
+    proc.kill()
+
+
+def run_with_watchdog(
+    fn: Callable,
+    args: tuple = (),
+    kwargs: Optional[dict] = None,
+    file_timeout: Optional[float] = None,
+    page_timeout: Optional[float] = None,
+    poll: float = 0.5,
+):
+    """
+    Ejecuta `fn(*args, on_progress=..., **kwargs)` en un proceso hijo.
+    `page_timeout` limita el tiempo entre dos llamadas a `on_progress`;
+    `file_timeout` limita la duración total. Devuelve (resultado, segundos).
+    """
+    ctx = mp.get_context()
+    recv, send = ctx.Pipe(duplex=False)
+    beat = ctx.Value("d", time.monotonic())
+    proc = ctx.Process(target=_child, args=(send, beat, fn, args, kwargs or {}), daemon=True)
+
+    t0 = time.monotonic()
+    proc.start()
+    send.close()
+    try:
+        while True:
+            if recv.poll(poll):
+                try:
+                    status, payload = recv.recv()
+                except EOFError:
+                    proc.join()
+                    raise RuntimeError(f"El worker terminó sin respuesta (código {proc.exitcode})")
+                proc.join(poll)
+                break
+            now = time.monotonic()
+            if file_timeout and now - t0 > file_timeout:
+                raise JobTimeout("archivo", now - t0)
+            if page_timeout and now - beat.value > page_timeout:
+                raise JobTimeout("página", now - beat.value)
+    finally:
+        if proc.is_alive():
+            _kill(proc)
+        proc.join()
+        recv.close()
+
+    if status == "error":
+        raise RuntimeError(payload)
+    return payload, time.monotonic() - t0
@@ -6,7 +6,7 @@ import os
 import yaml
 from pathlib import Path
 from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 
 
@@ -16,6 +16,7 @@ class PathsConfig:
     output_dir: str
     temp_dir: str
     logs_dir: str
+    quarantine_dir: str = "./quarantine"
 
 
 @dataclass
@@ -25,6 +26,7 @@ class ProcessingConfig:
     max_file_size_mb: int
     supported_formats: list
     table_detection_threshold: float
+    ocr_resolution: int = 300
 
 
 @dataclass
@@ -45,6 +47,25 @@ class ExcelConfig:
     default_sheet_name: str
 
 
+@dataclass
+class BatchConfig:
+    workers: int = 2
+    ocr_workers: int = 1
+    text_sample_pages: int = 3
+    cost_base_s: float = 0.5
+    cost_per_mb_s: float = 0.05
+    cost_per_page_s: float = 0.15
+    cost_per_ocr_page_s: float = 3.0
+    queue_size: int = 4
+    normalize_workers: int = 1
+    write_workers: int = 1
+    file_timeout_s: float = 600
+    page_timeout_s: float = 120
+    retry_ladder: list = field(
+        default_factory=lambda: [{"ocr_resolution": 150}, {"ocr_enabled": False}]
+    )
+
+
 @dataclass
 class LoggingConfig:
     level: str
@@ -135,6 +156,10 @@ class ConfigManager:
     def excel(self) -> ExcelConfig:
         return ExcelConfig(**self._config["excel"])
 
+    @property
+    def batch(self) -> BatchConfig:
+        return BatchConfig(**self._config.get("batch", {}))
+
     @property
     def logging_config(self) -> LoggingConfig:
         return LoggingConfig(**self._config["logging"])
@@ -1,7 +1,7 @@
 """
 Paquete de extractores.
 """
-from .pdf_reader import PDFTableExtractor
+from .pdf_reader import PDFTableExtractor, tesseract_available
 from .docx_reader import WordTableExtractor
 
-__all__ = ["PDFTableExtractor", "WordTableExtractor"]
+__all__ = ["PDFTableExtractor", "WordTableExtractor", "tesseract_available"]
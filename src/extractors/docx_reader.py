@@ -5,7 +5,7 @@ Extracción de tablas en Word (DOCX/DOC).
 import os
 import time
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Optional
 
 from docx import Document
 from docx.table import Table as DocxTable
@@ -20,12 +20,19 @@ class WordTableExtractor:
         self.cfg = config.processing
 
     # --------------------------------------------------------------- #
-    def extract_tables(self, doc_path: str) -> List[List[List[str]]]:
+    def extract_tables(
+        self, doc_path: str, on_progress: Optional[Callable[[], None]] = None
+    ) -> List[List[List[str]]]:
         self._validate(doc_path)
         t0 = time.time()
 
         doc = Document(doc_path)
-        tables = [self._table_to_list(t) for t in doc.tables if t.rows]
+        tables = []
+        for t in doc.tables:
+            if t.rows:
+                tables.append(self._table_to_list(t))
+            if on_progress:
+                on_progress()
 
         self.log.info(
             f"Word {Path(doc_path).name}: {len(tables)} tablas en {time.time()-t0:.2f}s"
@@ -4,8 +4,9 @@ Extracción de tablas en PDF con pdfplumber y OCR opcional.
 
 import os
 import time
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Optional
 
 import pdfplumber
 import pytesseract
@@ -15,26 +16,41 @@ from ..core.logger import get_logger
 from ..core.config import config
 
 
+@lru_cache(maxsize=None)
+def tesseract_available() -> bool:
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
 class PDFTableExtractor:
-    def __init__(self):
+    def __init__(self, ocr_enabled: Optional[bool] = None, ocr_resolution: Optional[int] = None):
         self.log = get_logger(__name__)
         self.cfg = config.processing
-        if self.cfg.ocr_enabled:
-            try:
-                pytesseract.get_tesseract_version()
-            except Exception:
-                self.log.warning("Tesseract no encontrado; OCR deshabilitado")
-                self.cfg.ocr_enabled = False
+        # Ajustes por llamada (p. ej. reintentos más baratos tras un timeout)
+        if ocr_enabled is not None:
+            self.cfg.ocr_enabled = ocr_enabled
+        if ocr_resolution is not None:
+            self.cfg.ocr_resolution = ocr_resolution
+        if self.cfg.ocr_enabled and not tesseract_available():
+            self.log.warning("Tesseract no encontrado; OCR deshabilitado")
+            self.cfg.ocr_enabled = False
 
     # --------------------------------------------------------------- #
-    def extract_tables(self, pdf_path: str) -> List[List[List[str]]]:
+    def extract_tables(
+        self, pdf_path: str, on_progress: Optional[Callable[[], None]] = None
+    ) -> List[List[List[str]]]:
+        """`on_progress` se invoca tras cada página (latido para el watchdog)."""
         self._validate(pdf_path)
         t0 = time.time()
-        tables = self._direct_extract(pdf_path)
+        on_progress = on_progress or (lambda: None)
+        tables = self._direct_extract(pdf_path, on_progress)
 
         if not tables and self.cfg.ocr_enabled:
             self.log.info("Sin tablas directas, probando OCR")
-            tables = self._ocr_extract(pdf_path)
+            tables = self._ocr_extract(pdf_path, on_progress)
 
         self.log.info(
             f"PDF {Path(pdf_path).name}: {len(tables)} tablas en {time.time()-t0:.2f}s"
@@ -50,21 +66,22 @@ class PDFTableExtractor:
         if os.path.getsize(pdf_path) / 1_048_576 > self.cfg.max_file_size_mb:
             raise ValueError("Archivo demasiado grande")
 
-    def _direct_extract(self, pdf_path: str):
+    def _direct_extract(self, pdf_path: str, on_progress):
         tables = []
         with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
                 for table in page.extract_tables():
                     if table and len(table) > 1 and len(table[0]) > 1:
                         tables.append([[c or "" for c in r] for r in table])
+                on_progress()
         return tables
 
-    def _ocr_extract(self, pdf_path: str):
+    def _ocr_extract(self, pdf_path: str, on_progress):
         """Implementación sencilla vía OCR, heurística de espacios."""
         tables = []
         with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
-                img = page.to_image(resolution=300).original
+                img = page.to_image(resolution=self.cfg.ocr_resolution).original
                 text = pytesseract.image_to_string(img, lang=self.cfg.ocr_language)
                 current = []
                 for line in text.split("\n"):
@@ -82,4 +99,5 @@ class PDFTableExtractor:
                         current = []
                 if current and len(current) > 1:
                     tables.append(current)
+                on_progress()
         return tables
@@ -1,6 +1,6 @@
 """
 Paquete de normalizadores.
 """
-from .table_normalizer import TableNormalizer
+from .table_normalizer import TableNormalizer, NormalizationPlan
 
-__all__ = ["TableNormalizer"]
+__all__ = ["TableNormalizer", "NormalizationPlan"]
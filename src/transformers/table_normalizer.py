@@ -3,10 +3,41 @@ Limpieza y tipado automático de tablas (pandas).
 """
 
 import re, unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
 import pandas as pd
 from ..core.logger import get_logger
 from ..core.config import config
 
+
+def _to_number(s):
+    return pd.to_numeric(s.astype(str).str.replace(",", "."), errors="coerce")
+
+
+def _to_currency(s):
+    return s.astype(str).str.replace(r"[€$¥£]", "", regex=True).str.replace(",", ".").astype(float)
+
+
+def _to_percent(s):
+    return s.astype(str).str.rstrip("%").str.replace(",", ".").astype(float) / 100
+
+
+def _to_date(s):
+    return pd.to_datetime(s, dayfirst=True, errors="coerce")
+
+
+COERCERS = {"number": _to_number, "currency": _to_currency, "percent": _to_percent, "date": _to_date}
+
+
+@dataclass
+class NormalizationPlan:
+    """Esquema ya resuelto para un encabezado: tipos, conversiones y nombres finales."""
+    columns: list
+    types: dict
+    coercions: list  # [(columna, función)]
+    final_columns: list
+
+
 class TableNormalizer:
     def __init__(self, mappings=None):
         self.log = get_logger(__name__)
@@ -26,6 +57,12 @@ class TableNormalizer:
             "percent": re.compile(r"^\d+(?:[.,]\d+)?%$"),
             "date": re.compile(r"^\d{1,2}[-/\\.]\d{1,2}[-/\\.]\d{2,4}$"),
         }
+        # Planes por firma de encabezado (LRU)
+        self._plans = OrderedDict()
+        self.plan_cache_size = self.cfg.get("plan_cache_size", 256)
+        self.type_sample_rows = self.cfg.get("type_sample_rows", 100)
+        self.plan_sample_rows = self.cfg.get("plan_sample_rows", 20)
+        self.plan_stats = {"hits": 0, "misses": 0, "fallbacks": 0}
 
     def normalize_table(self, raw, name="tabla"):
         if not raw:
@@ -40,8 +77,13 @@ class TableNormalizer:
 
         header = df.iloc[0]
         # Detección de encabezado vs datos
-        if sum(bool(self.regex["number"].match(str(v))) for v in header) < len(header)*0.4:
-            df.columns = [self._clean(h) for h in header]
+        has_header = sum(bool(self.regex["number"].match(str(v))) for v in header) < len(header)*0.4
+        # Sólo se cachean tablas con encabezado: sin él no hay firma fiable
+        key = tuple(str(v) for v in header) if has_header else None
+        plan = self._get_plan(key) if key else None
+
+        if has_header:
+            df.columns = plan.columns if plan else [self._clean(h) for h in header]
             df = df.iloc[1:].reset_index(drop=True)
         else:
             df.columns = [f"col_{i}" for i in range(df.shape[1])]
@@ -49,34 +91,81 @@ class TableNormalizer:
         if self.cfg["handle_merged_cells"]:
             df = df.fillna(method="ffill").fillna("")
 
+        # Validación barata del plan con una muestra pequeña; si falla se detecta
+        # todo de nuevo. No garantiza el mismo resultado que una detección completa.
+        if plan and not self._plan_fits(plan, df):
+            self.plan_stats["fallbacks"] += 1
+            self.log.debug(f"{name}: el plan no encaja con los datos, se reemplaza")
+            plan = None
+        if plan is None:
+            plan = self._build_plan(df)
+            if key:
+                self._put_plan(key, plan)
+
         # Tipificación de columnas
-        for col in df.columns:
-            typ = self._detect_type(df[col])
+        for col, coerce in plan.coercions:
             try:
-                if typ=="number":
-                    df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", "."), errors="coerce")
-                elif typ=="currency":
-                    df[col] = df[col].astype(str).str.replace(r"[€$¥£]", "", regex=True).str.replace(",", ".").astype(float)
-                elif typ=="percent":
-                    df[col] = df[col].astype(str).str.rstrip("%").str.replace(",", ".").astype(float) / 100
-                elif typ=="date":
-                    df[col] = pd.to_datetime(df[col], dayfirst=True, errors="coerce")
+                df[col] = coerce(df[col])
             except Exception as e:
                 self.log.debug(f"Error tipificando {col}: {e}")
 
-        # Renombrar columnas según mappings
-        df = df.rename(columns=self.mappings, errors="ignore")
+        # Nombres finales según mappings
+        df.columns = plan.final_columns
         return df.reset_index(drop=True)
 
+    def _build_plan(self, df):
+        columns = list(df.columns)
+        types = {col: self._detect_type(df[col]) for col in columns}
+        return NormalizationPlan(
+            columns=columns,
+            types=types,
+            coercions=[(col, COERCERS[typ]) for col, typ in types.items() if typ in COERCERS],
+            final_columns=[self.mappings.get(col, col) for col in columns],
+        )
+
+    def _plan_fits(self, plan, df):
+        # Columnas tipadas: sólo su patrón; columnas de texto: sólo "number"
+        for col, typ in plan.types.items():
+            sample = df[col].dropna().astype(str).head(self.plan_sample_rows)
+            if sample.empty:
+                continue
+            if typ == "text":
+                if self._share(sample, "number") > 0.6:
+                    return False
+            elif not self._share(sample, typ) > 0.6:
+                return False
+        return True
+
+    def _get_plan(self, key):
+        plan = self._plans.get(key)
+        if plan is None:
+            self.plan_stats["misses"] += 1
+            return None
+        self._plans.move_to_end(key)
+        self.plan_stats["hits"] += 1
+        return plan
+
+    def _put_plan(self, key, plan):
+        if self.plan_cache_size <= 0:
+            return
+        self._plans[key] = plan
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.plan_cache_size:
+            self._plans.popitem(last=False)
+
     def _clean(self, item):
         h = unicodedata.normalize("NFKD", str(item)).strip().lower()
         h = re.sub(r"[ \s]+", "_", h)
         h = re.sub(r"[^\w_]", "", h)
         return h or f"col_{len(h)}"
 
+    def _share(self, sample, name):
+        pat = self.regex[name]
+        return sample.apply(lambda x: bool(pat.match(x))).mean()
+
     def _detect_type(self, col):
-        sample = col.dropna().astype(str).head(100)
-        for name, pat in self.regex.items():
-            if sample.apply(lambda x: bool(pat.match(x))).mean() > 0.6:
+        sample = col.dropna().astype(str).head(self.type_sample_rows)
+        for name in self.regex:
+            if self._share(sample, name) > 0.6:
                 return name
         return "text"
@@ -0,0 +1,143 @@
+"""
+Pipeline por etapas con funciones de prueba en lugar de extractores reales.
+"""
+
+import os
+import time
+
+import pytest
+
+for _mod in ("loguru", "PyPDF2", "pdfplumber", "pytesseract", "PIL", "docx", "pandas"):
+    pytest.importorskip(_mod)
+
+from src.batch.pipeline import StagedPipeline, NORMALIZE, WRITE
+from src.batch.scheduler import BatchScheduler
+from src.core.config import config
+
+
+def _extract(src, on_progress=None, **settings):
+    on_progress()
+    return [[["Código", "Importe"], ["A1", "10"]]]
+
+
+def _normalize(tables):
+    return [t for t in tables], False
+
+
+def _write(dfs, is_ficha, src, dst):
+    return dst
+
+
+def _write_slow_for_b(dfs, is_ficha, src, dst):
+    if os.path.basename(src).startswith("b"):
+        time.sleep(30)
+    return dst
+
+
+def _write_partial_for_b(dfs, is_ficha, src, dst):
+    with open(dst, "wb") as fh:
+        fh.write(b"PK")
+        if os.path.basename(src).startswith("b"):
+            time.sleep(30)
+    return dst
+
+
+def _normalize_slow(tables):
+    time.sleep(0.4)
+    return [t for t in tables], False
+
+
+def _write_slow(dfs, is_ficha, src, dst):
+    time.sleep(0.4)
+    return dst
+
+
+def _plan_stats():
+    return {"planes_hits": 1}
+
+
+def _convert(src, dst, on_progress=None, **settings):
+    return dst
+
+
+def _normalize_crash(tables):
+    os._exit(3)
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    monkeypatch.setitem(config._config["paths"], "quarantine_dir", str(tmp_path / "cuarentena"))
+    monkeypatch.setitem(config._config["batch"], "queue_size", 1)
+    monkeypatch.setitem(config._config["batch"], "write_workers", 2)
+    files = []
+    for name in ("a.docx", "b.docx", "c.docx", "d.docx"):
+        path = tmp_path / name
+        path.write_bytes(b"PK")
+        files.append(path)
+    return files, tmp_path
+
+
+def test_all_files_written(batch):
+    files, out = batch
+    jobs, stats = StagedPipeline(_extract, _normalize, _write).run(files, out)
+    assert all(j.output and j.error is None for j in jobs)
+    assert stats.stages[WRITE].items == len(files)
+    assert stats.stages[WRITE].workers == 2
+
+
+def test_normalize_stats_reach_report(batch):
+    files, out = batch
+    jobs, stats = StagedPipeline(
+        _extract, _normalize, _write, normalize_stats_fn=_plan_stats
+    ).run(files, out)
+    assert stats.stages[NORMALIZE].extra == {"planes_hits": 1}
+    assert "planes_hits 1" in stats.report()
+
+
+def test_stage_timeout_quarantines_file(batch, monkeypatch):
+    files, out = batch
+    monkeypatch.setitem(config._config["batch"], "file_timeout_s", 0.5)
+    jobs, _ = StagedPipeline(_extract, _normalize, _write_slow_for_b).run(files, out)
+    by_name = {j.path.name: j for j in jobs}
+    assert by_name["b.docx"].quarantined
+    assert "timeout" in by_name["b.docx"].error
+    assert all(j.output for n, j in by_name.items() if n != "b.docx")
+
+
+def test_stage_timeout_removes_partial_output(batch, monkeypatch):
+    files, out = batch
+    monkeypatch.setitem(config._config["batch"], "file_timeout_s", 0.5)
+    jobs, _ = StagedPipeline(_extract, _normalize, _write_partial_for_b).run(files, out)
+    by_name = {j.path.name: j for j in jobs}
+    assert by_name["b.docx"].quarantined
+    assert not (out / "b.xlsx").exists()
+    assert (out / "a.xlsx").exists()
+
+
+def test_deadline_is_shared_across_stages(batch, monkeypatch):
+    files, out = batch
+    # Cada etapa cabe sola en el plazo, pero no las dos juntas
+    monkeypatch.setitem(config._config["batch"], "file_timeout_s", 0.6)
+    jobs, _ = StagedPipeline(_extract, _normalize_slow, _write_slow).run(files[:1], out)
+    assert "timeout" in jobs[0].error
+    assert jobs[0].output is None
+
+
+def test_dead_stage_fails_jobs_instead_of_hanging(batch):
+    files, out = batch
+    t0 = time.monotonic()
+    jobs, _ = StagedPipeline(_extract, _normalize_crash, _write).run(files, out)
+    assert time.monotonic() - t0 < 30
+    assert all(j.error and j.output is None for j in jobs)
+
+
+def test_cancel_skips_pending_jobs(batch):
+    files, out = batch
+    calls = []
+    scheduler = BatchScheduler(_convert, cancel=lambda: bool(calls))
+    jobs = scheduler.plan(files)
+    scheduler.on_result = lambda job, result: calls.append(job)
+    scheduler.run_jobs(jobs[:1], out)
+    scheduler.run_jobs(jobs[1:], out)
+    assert jobs[0].error is None and jobs[0].attempts == 1
+    assert all(j.attempts == 0 and "cancelado" in j.error for j in jobs[1:])
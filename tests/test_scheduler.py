@@ -0,0 +1,64 @@
+"""
+Planificación de BatchScheduler con la inspección de PDF simulada.
+"""
+
+import pytest
+
+for _mod in ("loguru", "PyPDF2", "pdfplumber", "pytesseract", "PIL", "docx"):
+    pytest.importorskip(_mod)
+
+import src.batch.scheduler as scheduler
+from src.batch.scheduler import BatchScheduler, CostEstimator, LANE_OCR, LANE_TEXT
+from src.core.config import config
+
+# nombre → (páginas, tiene capa de texto)
+PDFS = {
+    "escaneado_largo.pdf": (10, False),
+    "escaneado_corto.pdf": (2, False),
+    "texto_largo.pdf": (30, True),
+    "texto_corto.pdf": (1, True),
+}
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.setitem(config._config["processing"], "ocr_enabled", True)
+    monkeypatch.setattr(CostEstimator, "_inspect_pdf", lambda self, path: PDFS[path.name])
+    paths = []
+    for name in PDFS:
+        path = tmp_path / name
+        path.write_bytes(b"%PDF")
+        paths.append(path)
+    return paths
+
+
+def _plan(files):
+    return BatchScheduler(lambda *a, **k: None).plan(files)
+
+
+def test_scanned_pdfs_go_to_ocr_lane(files, monkeypatch):
+    monkeypatch.setattr(scheduler, "tesseract_available", lambda: True)
+    lanes = {j.path.name: j.lane for j in _plan(files)}
+    assert lanes == {
+        "escaneado_largo.pdf": LANE_OCR,
+        "escaneado_corto.pdf": LANE_OCR,
+        "texto_largo.pdf": LANE_TEXT,
+        "texto_corto.pdf": LANE_TEXT,
+    }
+
+
+def test_no_ocr_lane_without_tesseract(files, monkeypatch):
+    monkeypatch.setattr(scheduler, "tesseract_available", lambda: False)
+    jobs = _plan(files)
+    assert all(j.lane == LANE_TEXT and not j.needs_ocr for j in jobs)
+
+
+@pytest.mark.parametrize(
+    "tesseract, first", [(True, "escaneado_largo.pdf"), (False, "texto_largo.pdf")]
+)
+def test_plan_orders_by_predicted_cost(files, monkeypatch, tesseract, first):
+    monkeypatch.setattr(scheduler, "tesseract_available", lambda: tesseract)
+    jobs = _plan(files)
+    predicted = [j.predicted_s for j in jobs]
+    assert predicted == sorted(predicted, reverse=True)
+    assert jobs[0].path.name == first
@@ -0,0 +1,56 @@
+"""
+Caché de planes de TableNormalizer: validación barata del plan y vuelta a detectar.
+"""
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("loguru")
+
+from src.transformers.table_normalizer import TableNormalizer
+
+
+HEADER = ["Código", "Descripción", "Importe"]
+
+
+def test_text_plan_falls_back_when_column_turns_numeric():
+    normalizer = TableNormalizer()
+    # Primera tabla: importes mezclados, la columna se detecta como texto
+    normalizer.normalize_table([HEADER, ["A1", "Cemento", "n/d"], ["A2", "Arena", "s/p"]])
+    df = normalizer.normalize_table([HEADER, ["B1", "Cal", "12,5"], ["B2", "Yeso", "7"]])
+
+    fresh = TableNormalizer().normalize_table([HEADER, ["B1", "Cal", "12,5"], ["B2", "Yeso", "7"]])
+    assert df["importe"].tolist() == [12.5, 7.0]
+    assert df.dtypes.equals(fresh.dtypes)
+    assert normalizer.plan_stats["fallbacks"] == 1
+
+
+def test_plan_reused_for_same_header():
+    normalizer = TableNormalizer()
+    for i in range(3):
+        normalizer.normalize_table([HEADER, [f"A{i}", "Cemento", "10"], [f"B{i}", "Arena", "20"]])
+    assert normalizer.plan_stats == {"hits": 2, "misses": 1, "fallbacks": 0}
+
+
+def test_typed_plan_falls_back_when_pattern_fails():
+    normalizer = TableNormalizer()
+    normalizer.normalize_table([HEADER, ["A1", "Cemento", "10"], ["A2", "Arena", "20"]])
+    df = normalizer.normalize_table([HEADER, ["B1", "Cal", "n/d"], ["B2", "Yeso", "s/p"]])
+    assert df["importe"].tolist() == ["n/d", "s/p"]
+    assert normalizer.plan_stats["fallbacks"] == 1
+
+
+def test_plan_applies_mappings_and_coercions():
+    normalizer = TableNormalizer(mappings={"importe": "total"})
+    normalizer.normalize_table([HEADER, ["A1", "Cemento", "10"]])
+    plan = next(iter(normalizer._plans.values()))
+    assert plan.final_columns == ["codigo", "descripcion", "total"]
+    assert [col for col, _ in plan.coercions] == ["importe"]
+
+
+def test_headerless_tables_are_not_cached():
+    normalizer = TableNormalizer()
+    normalizer.normalize_table([["1", "2", "3"], ["4", "5", "6"]])
+    normalizer.normalize_table([["7", "8", "9"], ["1", "2", "3"]])
+    assert normalizer.plan_stats["hits"] == 0
+    assert not normalizer._plans
@@ -0,0 +1,125 @@
+"""
+Watchdog y escalera de reintentos con funciones que duermen o hacen bucle
+en lugar de PDFs patológicos.
+"""
+
+import os
+import subprocess
+import time
+
+import pytest
+
+for _mod in ("loguru", "PyPDF2", "pdfplumber", "pytesseract", "PIL", "docx"):
+    pytest.importorskip(_mod)
+
+from src.batch.scheduler import BatchScheduler, JobEstimate, LANE_OCR, LANE_TEXT
+from src.batch.watchdog import JobTimeout, run_with_watchdog
+
+
+def _quick(src, dst, on_progress=None, **settings):
+    on_progress()
+    return f"{dst}:{settings}"
+
+
+def _busy_loop(src, dst, on_progress=None, **settings):
+    # Avanza páginas para siempre: sólo lo detiene el presupuesto por archivo
+    while True:
+        time.sleep(0.05)
+        on_progress()
+
+
+def _silent_sleep(src, dst, on_progress=None, **settings):
+    time.sleep(60)
+
+
+def _spawn_and_sleep(pid_file, dst, on_progress=None, **settings):
+    child = subprocess.Popen(["sleep", "60"])
+    with open(pid_file, "w") as f:
+        f.write(str(child.pid))
+    time.sleep(60)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def _job(path, needs_ocr):
+    return JobEstimate(
+        path=path,
+        size_mb=0.0,
+        pages=1,
+        has_text_layer=not needs_ocr,
+        needs_ocr=needs_ocr,
+        predicted_s=1.0,
+        lane=LANE_OCR if needs_ocr else LANE_TEXT,
+    )
+
+
+def _scheduler(fn, tmp_path):
+    scheduler = BatchScheduler(fn)
+    scheduler.cfg.file_timeout_s = 0.6
+    scheduler.cfg.page_timeout_s = 0.3
+    scheduler.quarantine_dir = tmp_path / "cuarentena"
+    return scheduler
+
+
+def test_returns_result():
+    result, elapsed = run_with_watchdog(_quick, ("a.pdf", "a.xlsx"), {"ocr_enabled": False}, poll=0.05)
+    assert result == "a.xlsx:{'ocr_enabled': False}"
+    assert elapsed >= 0
+
+
+def test_file_timeout_despite_heartbeat():
+    with pytest.raises(JobTimeout) as exc:
+        run_with_watchdog(_busy_loop, ("a.pdf", "a.xlsx"), file_timeout=0.5, page_timeout=5, poll=0.05)
+    assert exc.value.kind == "archivo"
+
+
+def test_page_timeout_without_heartbeat():
+    t0 = time.monotonic()
+    with pytest.raises(JobTimeout) as exc:
+        run_with_watchdog(_silent_sleep, ("a.pdf", "a.xlsx"), file_timeout=30, page_timeout=0.3, poll=0.05)
+    assert exc.value.kind == "página"
+    assert time.monotonic() - t0 < 5
+
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="requiere grupos de procesos POSIX")
+def test_timeout_kills_process_group(tmp_path):
+    pid_file = tmp_path / "pid"
+    with pytest.raises(JobTimeout):
+        run_with_watchdog(_spawn_and_sleep, (str(pid_file), "a.xlsx"), page_timeout=1, poll=0.05)
+    pid = int(pid_file.read_text())
+    deadline = time.monotonic() + 5
+    while _pid_alive(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _pid_alive(pid)
+
+
+def test_ocr_job_walks_ladder_then_quarantine(tmp_path):
+    src = tmp_path / "escaneado.pdf"
+    src.write_bytes(b"%PDF-1.4")
+    scheduler = _scheduler(_silent_sleep, tmp_path)
+    job = _job(src, needs_ocr=True)
+
+    scheduler.run_jobs([job], tmp_path)
+
+    assert job.attempts == 1 + len(scheduler.cfg.retry_ladder)
+    assert job.settings == scheduler.cfg.retry_ladder[-1]
+    assert job.quarantined
+    assert (scheduler.quarantine_dir / src.name).exists()
+
+
+def test_text_job_quarantined_after_first_timeout(tmp_path):
+    src = tmp_path / "lento.docx"
+    src.write_bytes(b"PK")
+    scheduler = _scheduler(_silent_sleep, tmp_path)
+    job = _job(src, needs_ocr=False)
+
+    scheduler.run_jobs([job], tmp_path)
+
+    assert job.attempts == 1
+    assert job.quarantined